@@ -21,7 +21,16 @@ def run():
           packages=find_packages('src'),
           package_dir={'': 'src'},
           include_package_data=True,          
-          zip_safe=False
+          zip_safe=False,
+          install_requires=['pangadfs'],
+          extras_require={
+              'batch': ['pandas', 'pyarrow']
+          },
+          entry_points={
+              'console_scripts': [
+                  'pangadfs-batch = pangadfs_gui.batch:main'
+              ]
+          }
         )
 
 
@@ -0,0 +1,145 @@
+# pangadfsgui/src/pangadfs_gui/batch.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""Headless batch optimizer
+
+Runs the pangadfs optimizer over a directory of projection files
+without a display, one slate per worker process, and writes
+lineups and summaries to parquet.
+
+Usage:
+    pangadfs-batch projections/ --outdir output/ --workers 4
+
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from pangadfs.ga import GeneticAlgorithm
+from pangadfs_gui.loader import read_csv
+from pangadfs_gui.optimizer import DEFAULT_CTX, REQUIRED_COLUMNS, cache_pool, lineups_frame, top_lineups
+
+
+def optimize_slate(csvpth: Path, outdir: Path, ctx: Dict[str, Any], n_lineups: int) -> Dict[str, Any]:
+    """Optimizes a single slate, is run in a worker process
+
+    Args:
+        csvpth (Path): the projections file
+        outdir (Path): directory for the lineups file
+        ctx (Dict[str, Any]): the optimizer context
+        n_lineups (int): number of lineups to write
+
+    Returns:
+        Dict[str, Any]: summary of the slate
+
+    """
+    start = time.perf_counter()
+    # only read the header, the optimizer loads the full pool itself
+    missing = set(REQUIRED_COLUMNS) - set(read_csv(csvpth, nrows=0).columns)
+    if missing:
+        raise ValueError(f'{csvpth.name} is missing columns {sorted(missing)}')
+
+    ctx = copy.deepcopy(ctx)
+    ctx['ga_settings']['csvpth'] = csvpth
+    ga = GeneticAlgorithm(ctx=ctx, use_defaults=True)
+    # population holds indices into this pool, optimize() reuses it
+    pool = cache_pool(ga, csvpth)
+    results = ga.optimize()
+    lineups, scores = top_lineups(results['population'], results['fitness'], n_lineups)
+    lineups_frame(pool, lineups, scores).to_parquet(outdir / f'{csvpth.stem}_lineups.parquet', index=False)
+
+    return {
+        'slate': csvpth.stem,
+        'n_pool': len(pool),
+        'n_lineups': len(lineups),
+        'best_score': float(results['best_score']),
+        'mean_score': float(scores.mean()) if len(scores) else np.nan,
+        'elapsed': time.perf_counter() - start
+    }
+
+
+def positive_int(value: str) -> int:
+    """Argparse type for integers greater than zero"""
+    ivalue = int(value)
+    if ivalue < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return ivalue
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parses command line arguments"""
+    parser = argparse.ArgumentParser(prog='pangadfs-batch', description='Headless batch optimizer for pangadfs')
+    parser.add_argument('indir', type=Path, help='directory of projection csv files')
+    parser.add_argument('-o', '--outdir', type=Path, help='output directory, defaults to INDIR/output')
+    parser.add_argument('-p', '--pattern', default='*.csv', help='glob pattern for projection files')
+    parser.add_argument('-w', '--workers', type=positive_int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('-n', '--n-lineups', type=positive_int, default=150, help='lineups to write per slate')
+    parser.add_argument('--population-size', type=positive_int, help='overrides ga_settings.population_size')
+    parser.add_argument('--n-generations', type=positive_int, help='overrides ga_settings.n_generations')
+    parser.add_argument('--stop-criteria', type=positive_int, help='overrides ga_settings.stop_criteria')
+    parser.add_argument('-c', '--config', type=Path, help='json file with ga_settings / site_settings overrides')
+    return parser.parse_args(argv)
+
+
+def make_ctx(args: argparse.Namespace) -> Dict[str, Any]:
+    """Creates optimizer context from defaults, config file and arguments"""
+    ctx = copy.deepcopy(DEFAULT_CTX)
+    if args.config:
+        with args.config.open() as f:
+            for section, settings in json.load(f).items():
+                ctx.setdefault(section, {}).update(settings)
+    for key in ('population_size', 'n_generations', 'stop_criteria'):
+        if (val := getattr(args, key)) is not None:
+            ctx['ga_settings'][key] = val
+    return ctx
+
+
+def main(argv: List[str] = None) -> int:
+    """Entry point for pangadfs-batch"""
+    args = parse_args(argv)
+    files = sorted(args.indir.glob(args.pattern))
+    if not files:
+        print(f'No files matching {args.pattern} in {args.indir}', file=sys.stderr)
+        return 1
+
+    outdir = args.outdir or args.indir / 'output'
+    outdir.mkdir(parents=True, exist_ok=True)
+    ctx = make_ctx(args)
+
+    start = time.perf_counter()
+    summaries = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(optimize_slate, fn, outdir, ctx, args.n_lineups): fn for fn in files}
+        for future in as_completed(futures):
+            fn = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failed += 1
+                print(f'{fn.stem}: failed ({e})', file=sys.stderr)
+                continue
+            summaries.append(summary)
+            print(f"{summary['slate']}: {summary['elapsed']:.2f}s, best score {summary['best_score']:.2f}")
+
+    if summaries:
+        summary_df = pd.DataFrame(summaries).sort_values('slate').reset_index(drop=True)
+        summary_df.to_parquet(outdir / 'summary.parquet', index=False)
+    print(f'Optimized {len(summaries)} of {len(files)} slates in {time.perf_counter() - start:.2f}s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# pangadfsgui/src/pangadfs_gui/loader.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+from pathlib import Path
+from typing import Union
+
+__all__ = ['DfType', 'PANDAS_AVAILABLE', 'POLARS_AVAILABLE', 'read_csv']
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+if all((POLARS_AVAILABLE, PANDAS_AVAILABLE)):
+    DfType = Union[pl.DataFrame, pd.DataFrame]
+elif POLARS_AVAILABLE:
+    DfType = pl.DataFrame
+elif PANDAS_AVAILABLE:
+    DfType = pd.DataFrame
+
+
+def read_csv(fn: Union[str, Path], *args, backend: str = 'pandas', **kwargs) -> DfType:
+    """Reads csv into a dataframe without touching Qt
+
+    Args:
+        fn (Union[str, Path]): the csv file
+        *args: positional arguments for the backend reader
+        backend (str): 'pandas' or 'polars', keyword-only
+        **kwargs: keyword arguments for the backend reader
+
+    Returns:
+        DfType
+
+    """
+    if backend == 'pandas' and PANDAS_AVAILABLE:
+        return pd.read_csv(fn, *args, **kwargs)
+    if backend == 'polars' and POLARS_AVAILABLE:
+        return pl.read_csv(fn, *args, **kwargs)
+    raise ValueError(f'Backend {backend} is not available')
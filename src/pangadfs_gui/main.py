@@ -5,6 +5,8 @@
 
 import webbrowser
 
+import pandas as pd
+
 from PySide6.QtCore import QUrl
 from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtWebEngineWidgets import QWebEngineView
@@ -35,13 +37,20 @@ class MainWindow(QMainWindow):
         self.tabs.setDocumentMode(True)
 
         # tab 1: Projections
-        self.tabs.addTab(TabWidget(config=ConfigManager()), "Projections")
+        self.projections_tab = ProjectionsTabWidget(config=ConfigManager())
+        self.tabs.addTab(self.projections_tab, "Projections")
 
         # tab 2: Summary
-        self.tabs.addTab(TabWidget(config=ConfigManager()), "Summary")
+        self.summary_tab = TabWidget(config=ConfigManager(), model=PandasModel(df=pd.DataFrame()))
+        self.tabs.addTab(self.summary_tab, "Summary")
 
         # tab 3: Lineups
-        self.tabs.addTab(TabWidget(config=ConfigManager()), "Lineups")
+        self.lineups_tab = TabWidget(config=ConfigManager(), model=PandasModel(df=pd.DataFrame()))
+        self.tabs.addTab(self.lineups_tab, "Lineups")
+
+        # optimizer results go to the summary and lineups tabs
+        self.projections_tab.summary_changed.connect(self.summary_tab.model.setDataframe)
+        self.projections_tab.lineups_changed.connect(self.lineups_tab.model.setDataframe)
 
         self.setCentralWidget(self.tabs)
         
@@ -3,29 +3,62 @@
 # Copyright (C) 2021 Eric Truett
 # Licensed under the MIT License
 
-from typing import Any, Union
+from typing import Any, Dict, Iterable, Sequence
 
-from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal, Slot
+import numpy as np
 
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, Qt, Signal, Slot
 
-try:
-    import polars as pl
-    POLARS_AVAILABLE = True
-except ImportError:
-    POLARS_AVAILABLE = False
+from pangadfs_gui.loader import DfType, PANDAS_AVAILABLE, POLARS_AVAILABLE, read_csv
+from pangadfs_gui.stats import column_stats, format_stats
 
-try:
+if PANDAS_AVAILABLE:
     import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
 
-if all((POLARS_AVAILABLE, PANDAS_AVAILABLE)):
-    DfType = Union[pl.DataFrame, pd.DataFrame]
-elif POLARS_AVAILABLE:
-    DfType = pl.DataFrame
-elif PANDAS_AVAILABLE:
-    DfType = pd.DataFrame
+if POLARS_AVAILABLE:
+    import polars as pl
+
+
+class ColumnStatsSignals(QObject):
+    """Signals for ColumnStatsWorker, QRunnable cannot emit signals itself"""
+
+    column_ready = Signal(object, int, object)
+    finished = Signal()
+
+
+class ColumnStatsWorker(QRunnable):
+    """Calculates column statistics on a thread pool thread"""
+
+    def __init__(self, columns: Dict[Any, pd.Series], generations: Dict[Any, int], parent: QObject = None):
+        """Creates worker
+
+        Args:
+            columns (Dict[Any, pd.Series]): the columns, any the GUI thread edits in place are copies
+            generations (Dict[Any, int]): column name and cache generation to calculate
+            parent (QObject): owner of the signals, usually the model
+
+        """
+        super().__init__()
+        self.columns = columns
+        self.generations = generations
+        self.signals = ColumnStatsSignals(parent)
+
+    def run(self) -> None:
+        """Emits stats one column at a time so headers fill in as they are ready
+
+        A column that fails emits {'error': message} so it cannot stall the rest.
+        """
+        try:
+            for col, generation in self.generations.items():
+                try:
+                    stats = column_stats(self.columns[col])
+                except Exception as e:
+                    stats = {'error': str(e)}
+                self.signals.column_ready.emit(col, generation, stats)
+            self.signals.finished.emit()
+        except RuntimeError:
+            # model (and the signals it owns) was deleted while running
+            return
 
 
 class DataframeModel(QAbstractTableModel):
@@ -37,6 +70,8 @@ class DataframeModel(QAbstractTableModel):
         super().__init__(parent)
         self.df = df
         self.parent = parent
+        self.column_stats = {}
+        self.stats_generations = {}
 
     def rowCount(self, parent=QModelIndex()) -> int:
         """ Override method from QAbstractTableModel
@@ -70,18 +105,84 @@ class DataframeModel(QAbstractTableModel):
         """Loads csv from file"""
         raise NotImplementedError
 
+    def setDataframe(self, df: DfType):
+        """Replaces dataframe"""
+        raise NotImplementedError
+
     def sort(self, Ncol, order):
         """Sort table by given column number.
         """
         raise NotImplementedError
 
+    def to_tsv(self, rows: Sequence[int], columns: Sequence[int], header: bool = False) -> str:
+        """Serializes rows and columns (by position) as tab-separated text"""
+        raise NotImplementedError
+
+    def stats_columns(self, columns: Iterable[Any]) -> Dict[Any, pd.Series]:
+        """Gets columns as pandas series for the statistics worker"""
+        raise NotImplementedError
+
+    def stats_tooltip(self, section: int) -> str:
+        """Formats cached column statistics for the header tooltip"""
+        col = self.df.columns[section]
+        if col in self.column_stats:
+            return format_stats(str(col), self.column_stats[col])
+        return f'{col}\ncalculating statistics...'
+
+    def invalidate_column_stats(self, columns: Iterable[Any] = None) -> None:
+        """Drops cached column statistics and recalculates them in the background
+
+        Args:
+            columns (Iterable[Any]): the columns to recalculate, default all
+
+        Returns:
+            None
+
+        """
+        if columns is None:
+            self.column_stats.clear()
+            columns = self.df.columns
+        generations = {}
+        for col in columns:
+            self.column_stats.pop(col, None)
+            generations[col] = self.stats_generations.get(col, 0) + 1
+        self.stats_generations.update(generations)
+        if not generations:
+            return
+        worker = ColumnStatsWorker(self.stats_columns(generations), generations, self)
+        worker.signals.column_ready.connect(self.update_column_stats)
+        worker.signals.finished.connect(worker.signals.deleteLater)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(object, int, object)
+    def update_column_stats(self, col: Any, generation: int, stats: dict) -> None:
+        """Caches stats from worker unless the column was invalidated since"""
+        if self.stats_generations.get(col) != generation or col not in self.df.columns:
+            return
+        self.column_stats[col] = stats
+        section = list(self.df.columns).index(col)
+        self.headerDataChanged.emit(Qt.Horizontal, section, section)
+
 
 class PandasModel(DataframeModel):
 
-    def __init__(self, df: pd.DataFrame, parent: Any = None):
+    def __init__(self, df: pd.DataFrame, parent: Any = None, checkable_columns: Iterable[str] = ()):
         super().__init__(df, parent)
+        self.checkable_columns = tuple(checkable_columns)
+        self.add_checkable_columns()
         self.values = self.df.values
         self.dataframe_changed.connect(self.update_values)
+        self.invalidate_column_stats()
+
+    def add_checkable_columns(self) -> None:
+        """Adds missing checkable (boolean flag) columns to the dataframe"""
+        for col in self.checkable_columns:
+            if col not in self.df.columns:
+                self.df[col] = False
+
+    def is_checkable(self, index: QModelIndex) -> bool:
+        """Checks if the index is in a checkable column"""
+        return self.df.columns[index.column()] in self.checkable_columns
 
     def columnCount(self, parent=QModelIndex()) -> int:
         """Override method from QAbstractTableModel
@@ -108,11 +209,45 @@ class PandasModel(DataframeModel):
         if not index.isValid():
             return None
 
-        if role == Qt.DisplayRole:
+        if role == Qt.CheckStateRole and self.is_checkable(index):
+            return Qt.Checked if self.values[index.row(), index.column()] else Qt.Unchecked
+
+        if role == Qt.DisplayRole and not self.is_checkable(index):
             return str(self.values[index.row(), index.column()])
 
         return None
 
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        """Override method from QAbstractTableModel
+        Makes checkable columns user-checkable
+        """
+        flags = super().flags(index)
+        if index.isValid() and self.is_checkable(index):
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index: QModelIndex, value: Any, role=Qt.EditRole) -> bool:
+        """Override method from QAbstractTableModel
+        Toggles flag in checkable column, updates dataframe and values in place
+
+        Args:
+            index (QModelIndex): the index
+            value (Any): the new check state
+            role (Qt.ItemDataRole): the role
+
+        Returns:
+            bool
+
+        """
+        if not index.isValid() or role != Qt.CheckStateRole or not self.is_checkable(index):
+            return False
+        checked = Qt.CheckState(value) == Qt.Checked
+        self.df.iat[index.row(), index.column()] = checked
+        self.values[index.row(), index.column()] = checked
+        self.dataChanged.emit(index, index, [role])
+        self.invalidate_column_stats([self.df.columns[index.column()]])
+        return True
+
     def headerData(self, section: int, orientation: Qt.Orientation, role: Qt.ItemDataRole) -> str:
         """Override method from QAbstractTableModel
         Return dataframe index as vertical header data and columns as horizontal header data.
@@ -133,13 +268,35 @@ class PandasModel(DataframeModel):
             if orientation == Qt.Vertical:
                 return str(self.df.index[section])
 
+        if role == Qt.ToolTipRole and orientation == Qt.Horizontal:
+            return self.stats_tooltip(section)
+
         return None
 
+    def stats_columns(self, columns: Iterable[Any]) -> Dict[Any, pd.Series]:
+        """Gets columns for the statistics worker
+        Only checkable columns are edited in place (setData), so only those are copied,
+        everything else replaces self.df and leaves the worker's series alone.
+        """
+        return {col: self.df[col].copy() if col in self.checkable_columns else self.df[col] for col in columns}
+
     def loadCsv(self, fn, *args, **kwargs):
         """Loads csv from file"""
-        self.df = pd.read_csv(fn, *args, **kwargs)
+        self.df = read_csv(fn, *args, backend='pandas', **kwargs)
+        self.add_checkable_columns()
         self.dataframe_changed.emit()
         self.layoutChanged.emit()
+        self.invalidate_column_stats()
+
+    @Slot(object)
+    def setDataframe(self, df: pd.DataFrame) -> None:
+        """Replaces dataframe, e.g. with optimizer results"""
+        self.beginResetModel()
+        self.df = df
+        self.add_checkable_columns()
+        self.dataframe_changed.emit()
+        self.endResetModel()
+        self.invalidate_column_stats()
 
     def rowCount(self, parent=QModelIndex()) -> int:
         """ Override method from QAbstractTableModel
@@ -162,6 +319,9 @@ class PandasModel(DataframeModel):
             None
 
         """
+        # the view sets a sort indicator on empty placeholder frames too
+        if not len(self.df.columns):
+            return
         self.layoutAboutToBeChanged.emit()
         if order == Qt.DescendingOrder:
             ascending = False
@@ -171,6 +331,21 @@ class PandasModel(DataframeModel):
         self.dataframe_changed.emit()
         self.layoutChanged.emit()
 
+    def to_tsv(self, rows: Sequence[int], columns: Sequence[int], header: bool = False) -> str:
+        """Serializes rows and columns (by position) as tab-separated text
+        Slices the backing dataframe once rather than going through data()
+
+        Args:
+            rows (Sequence[int]): the row positions
+            columns (Sequence[int]): the column positions
+            header (bool): include column names
+
+        Returns:
+            str
+
+        """
+        return self.df.iloc[rows, columns].to_csv(sep='\t', index=False, header=header)
+
     @Slot()
     def update_values(self) -> None:
         """Updates dataframe history"""
@@ -183,6 +358,7 @@ class PolarsModel(DataframeModel):
     def __init__(self, df: pl.DataFrame, parent=None):
         super().__init__(df, parent)
         self.df_index = list(range(self.df.height))
+        self.invalidate_column_stats()
 
     def columnCount(self, parent=QModelIndex()) -> int:
         """Override method from DataframeModel
@@ -213,13 +389,16 @@ class PolarsModel(DataframeModel):
                 return str(self.df.columns[section])
             if orientation == Qt.Vertical:
                 return str(self.df_index[section])
+        if role == Qt.ToolTipRole and orientation == Qt.Horizontal:
+            return self.stats_tooltip(section)
         return None
 
     def loadCsv(self, fn, *args, **kwargs):
         """Loads csv from file"""
-        self.df = pl.read_csv(fn, *args, **kwargs)
+        self.df = read_csv(fn, *args, backend='polars', **kwargs)
         self.dataframe_changed.emit()
         self.layoutChanged.emit()
+        self.invalidate_column_stats()
 
     def rowCount(self, parent=QModelIndex()) -> int:
         """ Override method from DataframeModel
@@ -233,6 +412,8 @@ class PolarsModel(DataframeModel):
     def sort(self, Ncol, order):
         """Sort table by given column number.
         """
+        if not len(self.df.columns):
+            return
         self.layoutAboutToBeChanged.emit()
         if order == Qt.DescendingOrder:
             reverse = True
@@ -242,6 +423,17 @@ class PolarsModel(DataframeModel):
         self.dataframe_changed.emit()
         self.layoutChanged.emit()
 
+    def to_tsv(self, rows: Sequence[int], columns: Sequence[int], header: bool = False) -> str:
+        """Serializes rows and columns (by position) as tab-separated text
+        Uses separator / include_header keywords (polars >= 0.19)
+        """
+        df = self.df.select([self.df.columns[col] for col in columns])
+        return df[np.asarray(rows, dtype=np.int64)].write_csv(separator='\t', include_header=header)
+
+    def stats_columns(self, columns: Iterable[Any]) -> Dict[Any, pd.Series]:
+        """Converts columns to pandas series for the statistics worker, polars series are immutable"""
+        return {col: pd.Series(self.df[col].to_numpy(), name=col) for col in columns}
+
     @Slot()
     def update_index(self) -> None:
         """Updates dataframe history"""
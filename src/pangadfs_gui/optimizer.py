@@ -0,0 +1,481 @@
+# pangadfsgui/src/pangadfs_gui/optimizer.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from pangadfs.ga import GeneticAlgorithm
+
+
+REQUIRED_COLUMNS = ('player', 'team', 'pos', 'salary', 'proj')
+
+LOCK_COLUMN = 'lock'
+EXCLUDE_COLUMN = 'exclude'
+STARTED_COLUMN = 'started'
+FLAG_COLUMNS = (LOCK_COLUMN, EXCLUDE_COLUMN, STARTED_COLUMN)
+
+DEFAULT_CTX = {
+    'ga_settings': {
+        'crossover_method': 'uniform',
+        'csvpth': None,
+        'elite_divisor': 5,
+        'elite_method': 'fittest',
+        'mutation_rate': .05,
+        'n_generations': 20,
+        'points_column': 'proj',
+        'population_size': 30000,
+        'position_column': 'pos',
+        'salary_column': 'salary',
+        'select_method': 'roulette',
+        'stop_criteria': 10,
+        'verbose': False
+    },
+    'site_settings': {
+        'flex_positions': ('RB', 'WR', 'TE'),
+        'lineup_size': 9,
+        'posfilter': {'QB': 14, 'RB': 8, 'WR': 8, 'TE': 5, 'DST': 4, 'FLEX': 8},
+        'posmap': {'DST': 1, 'QB': 1, 'TE': 1, 'RB': 2, 'WR': 3, 'FLEX': 7},
+        'salary_cap': 50000
+    }
+}
+
+
+def cache_pool(ga: GeneticAlgorithm, csvpth: Path) -> pd.DataFrame:
+    """Loads the pool once and makes the ga reuse it instead of re-reading the csv
+
+    Population indices refer to this frame, so it can also be used to map lineups.
+
+    Args:
+        ga (GeneticAlgorithm): the ga instance
+        csvpth (Path): the projections file
+
+    Returns:
+        pd.DataFrame
+
+    """
+    pool = ga.pool(csvpth=csvpth)
+    ga.pool = lambda **kwargs: pool
+    return pool
+
+
+def player_flags(pool: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Gets lock, exclude and started flags as boolean arrays in pool order
+
+    Args:
+        pool (pd.DataFrame): the optimizer pool, missing flag columns are all False
+
+    Returns:
+        tuple of np.ndarray: (locked, excluded, started)
+
+    """
+    def _flag(col):
+        if col not in pool.columns:
+            return np.zeros(len(pool), dtype=bool)
+        return pool[col].fillna(False).astype(bool).values
+    return tuple(_flag(col) for col in FLAG_COLUMNS)
+
+
+def find_violations(population: np.ndarray, locked: np.ndarray, excluded: np.ndarray) -> np.ndarray:
+    """Finds lineups that contain an excluded player or are missing a locked player
+
+    Args:
+        population (np.ndarray): 2D array of pool indices
+        locked (np.ndarray): 1D bool array in pool order
+        excluded (np.ndarray): 1D bool array in pool order
+
+    Returns:
+        np.ndarray: 1D bool array, True where lineup violates constraints
+
+    """
+    has_excluded = excluded[population].any(axis=1)
+    lock_idx = np.flatnonzero(locked)
+    if not len(lock_idx):
+        return has_excluded
+    has_locks = (population[:, :, None] == lock_idx).any(axis=1).all(axis=1)
+    return has_excluded | ~has_locks
+
+
+def swap_candidates(positions: np.ndarray, available: np.ndarray) -> Dict[int, np.ndarray]:
+    """Groups players that can be swapped into a lineup by position code"""
+    return {code: np.flatnonzero(available & (positions == code)) for code in np.unique(positions)}
+
+
+def enforced_flags(locked: np.ndarray,
+                   excluded: np.ndarray,
+                   started: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Gets the locks and excludes that can still be enforced
+
+    Players whose games have started can neither be swapped in nor out,
+    so started locks are only kept where they already are and started
+    excludes are left alone. Excluding a player overrides a lock.
+
+    Args:
+        locked (np.ndarray): 1D bool array in pool order
+        excluded (np.ndarray): 1D bool array in pool order
+        started (np.ndarray): 1D bool array in pool order
+
+    Returns:
+        tuple of np.ndarray: (required, removable)
+
+    """
+    return locked & ~started & ~excluded, excluded & ~started
+
+
+def repair(population: np.ndarray,
+           positions: np.ndarray,
+           locked: np.ndarray,
+           excluded: np.ndarray,
+           started: np.ndarray,
+           rng: np.random.Generator = None,
+           return_index: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Repairs lineups that violate lock / exclude constraints, leaves the rest alone
+
+    Excluded players are replaced by a random player at the same position.
+    Missing locks replace a same-position player who is not locked or started.
+    Players whose games have started are never swapped in or out.
+    Lineups keep their order, lineups that cannot be repaired are dropped.
+
+    Args:
+        population (np.ndarray): 2D array of pool indices
+        positions (np.ndarray): 1D array of position codes in pool order
+        locked (np.ndarray): 1D bool array in pool order
+        excluded (np.ndarray): 1D bool array in pool order
+        started (np.ndarray): 1D bool array in pool order
+        rng (np.random.Generator): optional random generator
+        return_index (bool): also return the rows of population that were kept
+
+    Returns:
+        np.ndarray: repaired population, or (population, index) if return_index
+
+    """
+    rng = rng or np.random.default_rng()
+    required, removable = enforced_flags(locked, excluded, started)
+    frozen = required | started
+    violations = find_violations(population, required, removable)
+    if not violations.any():
+        return (population, np.arange(len(population))) if return_index else population
+
+    bad = population[violations].copy()
+    candidates = swap_candidates(positions, ~(excluded | locked | started))
+    keep = np.ones(len(bad), dtype=bool)
+
+    # replace excluded players with same-position players
+    replace = removable[bad]
+    for code, cands in candidates.items():
+        sel = replace & (positions[bad] == code)
+        n = sel.sum()
+        if not n:
+            continue
+        if not len(cands):
+            keep &= ~sel.any(axis=1)
+            continue
+        bad[sel] = rng.choice(cands, size=n)
+
+    # swap locked players in for an unfrozen player at the same position
+    for player in np.flatnonzero(required):
+        missing = ~(bad == player).any(axis=1)
+        slots = (positions[bad] == positions[player]) & ~frozen[bad]
+        rows = np.flatnonzero(missing & slots.any(axis=1))
+        bad[rows, slots[rows].argmax(axis=1)] = player
+        keep &= ~(missing & ~slots.any(axis=1))
+
+    repaired = population.copy()
+    repaired[violations] = bad
+    index = np.flatnonzero(~violations)
+    index = np.sort(np.concatenate((index, np.flatnonzero(violations)[keep])))
+    return (repaired[index], index) if return_index else repaired[index]
+
+
+def valid_lineups(population: np.ndarray, salaries: np.ndarray, salary_cap: int) -> np.ndarray:
+    """Flags lineups under the salary cap without duplicate players
+
+    Unlike ga.validate, does not sort or drop rows, so lineups keep their identity.
+
+    Args:
+        population (np.ndarray): 2D array of pool indices
+        salaries (np.ndarray): 1D array of salaries in pool order
+        salary_cap (int): the salary cap
+
+    Returns:
+        np.ndarray: 1D bool array, True for valid lineups
+
+    """
+    players = np.sort(population, axis=1)
+    unique = (players[:, 1:] != players[:, :-1]).all(axis=1)
+    return unique & (salaries[population].sum(axis=1) <= salary_cap)
+
+
+def usable_pospool(ga: GeneticAlgorithm, pool: pd.DataFrame, usable: np.ndarray) -> Dict[str, pd.DataFrame]:
+    """Creates the pangadfs pospool from the players that can still be added to lineups
+
+    Args:
+        ga (GeneticAlgorithm): the ga instance
+        pool (pd.DataFrame): the optimizer pool
+        usable (np.ndarray): 1D bool array in pool order
+
+    Returns:
+        Dict[str, pd.DataFrame]: players by position, keeps pool indices
+
+    """
+    settings = ga.ctx['ga_settings']
+    site_settings = ga.ctx['site_settings']
+    return ga.pospool(
+        pool=pool.loc[usable],
+        posfilter=site_settings['posfilter'],
+        column_mapping={'points': settings['points_column'],
+                        'position': settings['position_column'],
+                        'salary': settings['salary_column']},
+        flex_positions=site_settings['flex_positions']
+    )
+
+
+def top_up(ga: GeneticAlgorithm,
+           population: np.ndarray,
+           size: int,
+           pospool: Dict[str, pd.DataFrame],
+           salaries: np.ndarray,
+           positions: np.ndarray,
+           flags: Tuple[np.ndarray, np.ndarray, np.ndarray],
+           rng: np.random.Generator = None,
+           n_attempts: int = 3) -> np.ndarray:
+    """Adds new lineups from the players that can still be used until population has size rows
+
+    Args:
+        ga (GeneticAlgorithm): the ga instance
+        population (np.ndarray): 2D array of pool indices
+        size (int): the target population size
+        pospool (Dict[str, pd.DataFrame]): output of usable_pospool
+        salaries (np.ndarray): 1D array of salaries in pool order
+        positions (np.ndarray): 1D array of position codes in pool order
+        flags (tuple of np.ndarray): (locked, excluded, started)
+        rng (np.random.Generator): optional random generator
+        n_attempts (int): rounds of new lineups to try
+
+    Returns:
+        np.ndarray: the population, may still be short if new lineups are invalid
+
+    """
+    if len(population) >= size or any(not len(players) for players in pospool.values()):
+        return population
+    site_settings = ga.ctx['site_settings']
+
+    # new lineups lose some rows to repair and validation, so oversample and retry
+    for _ in range(n_attempts):
+        n = size - len(population)
+        if n <= 0:
+            break
+        new = ga.populate(pospool=pospool, posmap=site_settings['posmap'], population_size=n * 2)
+        new = repair(new, positions, *flags, rng)
+        new = ga.validate(population=new, salaries=salaries, salary_cap=site_settings['salary_cap'])
+        if not len(population):
+            population = new[:n]
+            continue
+        population = ga.validate(
+            population=np.vstack((population, new[:n])),
+            salaries=salaries,
+            salary_cap=site_settings['salary_cap']
+        )
+    return population
+
+
+def top_lineups(population: np.ndarray, fitness: np.ndarray, n: int) -> tuple:
+    """Gets the n best unique lineups from a population
+
+    Args:
+        population (np.ndarray): 2D array of pool indices
+        fitness (np.ndarray): 1D array of lineup scores
+        n (int): number of lineups to keep
+
+    Returns:
+        tuple of np.ndarray: (lineups, scores)
+
+    """
+    _, idx = np.unique(np.sort(population, axis=1), axis=0, return_index=True)
+    idx = idx[np.argsort(fitness[idx])[::-1][:n]]
+    return population[idx], fitness[idx]
+
+
+def lineups_frame(pool: pd.DataFrame,
+                  lineups: np.ndarray,
+                  scores: np.ndarray,
+                  numbers: np.ndarray = None) -> pd.DataFrame:
+    """Expands lineups to one row per player with lineup number and score
+
+    Args:
+        pool (pd.DataFrame): the optimizer pool
+        lineups (np.ndarray): 2D array of pool indices
+        scores (np.ndarray): 1D array of lineup scores
+        numbers (np.ndarray): optional lineup numbers, defaults to 0..n-1
+
+    Returns:
+        pd.DataFrame
+
+    """
+    lineup_size = lineups.shape[1]
+    if numbers is None:
+        numbers = np.arange(len(lineups))
+    df = pool.loc[lineups.ravel(), :].reset_index(drop=True)
+    df.insert(0, 'lineup', np.repeat(numbers, lineup_size))
+    df.insert(1, 'lineup_score', np.repeat(scores, lineup_size))
+    return df
+
+
+def local_search(population: np.ndarray,
+                 positions: np.ndarray,
+                 points: np.ndarray,
+                 salaries: np.ndarray,
+                 salary_cap: int,
+                 frozen: np.ndarray,
+                 candidates: Dict[int, np.ndarray],
+                 n_iterations: int = 50,
+                 rng: np.random.Generator = None) -> np.ndarray:
+    """Improves each lineup in place by swapping only its unfrozen players
+
+    Unlike crossover, lineups keep their identity, which is what late swap needs.
+
+    Args:
+        population (np.ndarray): 2D array of pool indices
+        positions (np.ndarray): 1D array of position codes in pool order
+        points (np.ndarray): 1D array of projections in pool order
+        salaries (np.ndarray): 1D array of salaries in pool order
+        salary_cap (int): the salary cap
+        frozen (np.ndarray): 1D bool array, players that cannot be moved
+        candidates (Dict[int, np.ndarray]): swap candidates by position code
+        n_iterations (int): number of swap attempts per lineup
+        rng (np.random.Generator): optional random generator
+
+    Returns:
+        np.ndarray: same shape as population
+
+    """
+    rng = rng or np.random.default_rng()
+    population = population.copy()
+    for _ in range(n_iterations):
+        movable = ~frozen[population]
+        rows = np.flatnonzero(movable.any(axis=1))
+        if not len(rows):
+            break
+        cols = (rng.random((len(rows), population.shape[1])) * movable[rows]).argmax(axis=1)
+        current = population[rows, cols]
+        proposed = current.copy()
+        for code, cands in candidates.items():
+            sel = positions[current] == code
+            if sel.any() and len(cands):
+                proposed[sel] = rng.choice(cands, size=sel.sum())
+        lineups = population[rows]
+        salary = salaries[lineups].sum(axis=1) - salaries[current] + salaries[proposed]
+        accept = (
+            (points[proposed] > points[current]) &
+            (salary <= salary_cap) &
+            ~(lineups == proposed[:, None]).any(axis=1)
+        )
+        population[rows[accept], cols[accept]] = proposed[accept]
+    return population
+
+
+def reoptimize(ga: GeneticAlgorithm,
+               pool: pd.DataFrame,
+               population: np.ndarray,
+               n_generations: int = 5,
+               rng: np.random.Generator = None) -> Dict[str, Any]:
+    """Re-optimizes an existing lineup pool after locks / excludes / late swap change
+
+    Warm-starts from the existing population and only repairs lineups that violate
+    the new constraints. Without late swap, tops the population back up to its
+    prior size with new lineups, then runs a few pangadfs generations and
+    re-repairs the offspring. With late swap (any started players), lineups are
+    already entered, so none are added or reordered: crossover would move started
+    players between lineups, so each lineup is improved with a local search over
+    its unstarted players instead, and 'lineup_ids' maps the output back to the input.
+
+    Args:
+        ga (GeneticAlgorithm): the ga instance used for the original run
+        pool (pd.DataFrame): the optimizer pool with optional flag columns
+        population (np.ndarray): the prior population of pool indices
+        n_generations (int): generations (or local search rounds of 10 swaps)
+        rng (np.random.Generator): optional random generator
+
+    Returns:
+        Dict
+        'population': np.ndarray,
+        'fitness': np.ndarray,
+        'best_lineup': pd.DataFrame,
+        'best_score': float,
+        'n_repaired': int,
+        'lineup_ids': np.ndarray of input rows with late swap, otherwise None
+
+    Raises:
+        ValueError: if no lineup satisfies the locks and excludes
+
+    """
+    rng = rng or np.random.default_rng()
+    settings = ga.ctx['ga_settings']
+    salary_cap = ga.ctx['site_settings']['salary_cap']
+    points = pool[settings['points_column']].values
+    salaries = pool[settings['salary_column']].values
+    positions = pd.factorize(pool[settings['position_column']])[0]
+    flags = locked, excluded, started = player_flags(pool)
+    required, removable = enforced_flags(*flags)
+    size = len(population)
+    n_repaired = int(find_violations(population, required, removable).sum())
+    lineup_ids = None
+
+    if started.any():
+        population, lineup_ids = repair(population, positions, *flags, rng, return_index=True)
+        valid = valid_lineups(population, salaries, salary_cap)
+        population, lineup_ids = population[valid], lineup_ids[valid]
+        if not len(population):
+            raise ValueError('No valid lineups satisfy the current locks and excludes')
+        frozen = required | started
+        candidates = swap_candidates(positions, ~(excluded | locked | started))
+        population = local_search(population, positions, points, salaries, salary_cap,
+                                  frozen, candidates, n_iterations=n_generations * 10, rng=rng)
+    else:
+        # built once, every top up draws from the same players
+        pospool = usable_pospool(ga, pool, ~excluded)
+        population = repair(population, positions, *flags, rng)
+        population = ga.validate(population=population, salaries=salaries, salary_cap=salary_cap)
+        population = top_up(ga, population, size, pospool, salaries, positions, flags, rng)
+        if not len(population):
+            raise ValueError('No valid lineups satisfy the current locks and excludes')
+        for _ in range(n_generations):
+            population_fitness = ga.fitness(population=population, points=points)
+            elite = ga.select(
+                population=population,
+                population_fitness=population_fitness,
+                n=len(population) // settings.get('elite_divisor', 5),
+                method=settings.get('elite_method', 'fittest')
+            )
+            selected = ga.select(
+                population=population,
+                population_fitness=population_fitness,
+                n=len(population),
+                method=settings.get('select_method', 'roulette')
+            )
+            crossed_over = ga.crossover(population=selected, method=settings.get('crossover_method', 'uniform'))
+            mutated = ga.mutate(population=crossed_over, mutation_rate=settings.get('mutation_rate', .05))
+            mutated = repair(mutated, positions, *flags, rng)
+            population = ga.validate(
+                population=np.vstack((elite, mutated)),
+                salaries=salaries,
+                salary_cap=salary_cap
+            )
+            population = top_up(ga, population, size, pospool, salaries, positions, flags, rng)
+            if not len(population):
+                raise ValueError('No valid lineups satisfy the current locks and excludes')
+
+    population_fitness = ga.fitness(population=population, points=points)
+    omidx = population_fitness.argmax()
+    return {
+        'population': population,
+        'fitness': population_fitness,
+        'best_lineup': pool.loc[population[omidx], :],
+        'best_score': population_fitness[omidx],
+        'n_repaired': n_repaired,
+        'lineup_ids': lineup_ids
+    }
@@ -0,0 +1,71 @@
+# pangadfsgui/src/pangadfs_gui/stats.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+def column_stats(s: pd.Series, bins: int = 10) -> Dict[str, Any]:
+    """Calculates summary statistics and histogram for a column
+
+    Args:
+        s (pd.Series): the column
+        bins (int): number of histogram bins (or top values for non-numeric columns)
+
+    Returns:
+        Dict[str, Any], min / max / mean / histogram only use finite values
+
+    """
+    nulls = int(s.isna().sum())
+    stats = {'count': len(s) - nulls, 'nulls': nulls}
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        values = s.dropna().to_numpy(dtype=float)
+        finite = np.isfinite(values)
+        stats['inf'] = int((~finite).sum())
+        values = values[finite]
+        if len(values):
+            counts, edges = np.histogram(values, bins=bins)
+            stats.update(min=values.min(), max=values.max(), mean=values.mean(), hist=counts, edges=edges)
+    else:
+        stats['top'] = s.value_counts().head(bins)
+    return stats
+
+
+def sparkline(counts: np.ndarray) -> str:
+    """Draws histogram counts as a line of block characters"""
+    if not len(counts) or not counts.max():
+        return ''
+    idx = np.ceil(counts / counts.max() * (len(SPARK_CHARS) - 1)).astype(int)
+    return ''.join(SPARK_CHARS[i] for i in idx)
+
+
+def format_stats(name: str, stats: Dict[str, Any]) -> str:
+    """Formats column statistics as tooltip text
+
+    Args:
+        name (str): the column name
+        stats (Dict[str, Any]): output of column_stats
+
+    Returns:
+        str
+
+    """
+    if 'error' in stats:
+        return f"{name}\nstatistics failed: {stats['error']}"
+    counts = f"count: {stats['count']:,}  nulls: {stats['nulls']:,}"
+    if stats.get('inf'):
+        counts += f"  inf: {stats['inf']:,}"
+    lines = [name, counts]
+    if 'hist' in stats:
+        lines.append(f"min: {stats['min']:,.2f}  max: {stats['max']:,.2f}  mean: {stats['mean']:,.2f}")
+        lines.append(sparkline(stats['hist']))
+    elif 'top' in stats:
+        lines.extend(f'{value}: {count:,}' for value, count in stats['top'].items())
+    return '\n'.join(lines)
@@ -3,8 +3,11 @@
 # Copyright (C) 2021 Eric Truett
 # Licensed under the MIT License
 
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QTableView, QHeaderView, QWidget
+import numpy as np
+
+from PySide6.QtCore import Qt, Slot
+from PySide6.QtGui import QAction, QGuiApplication, QKeySequence
+from PySide6.QtWidgets import QTableView, QHeaderView, QMessageBox, QWidget
 
 from pangadfs_gui.model import DataframeModel
 
@@ -55,4 +58,48 @@ class DataframeView(QTableView):
         horizontal_header.sortIndicatorChanged.connect(self.model.sort)
         horizontal_header.setSortIndicator(0, Qt.AscendingOrder)
         self.vertical_header = self.view.verticalHeader()
-        self.vertical_header.setSectionResizeMode(QHeaderView.ResizeToContents)
\ No newline at end of file
+        self.vertical_header.setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        # copy selection to clipboard as tab-separated text
+        self.copy_action = QAction("Copy", self.view)
+        self.copy_action.setShortcut(QKeySequence.Copy)
+        self.copy_action.setShortcutContext(Qt.WidgetWithChildrenShortcut)
+        self.copy_action.triggered.connect(self.copy_selection)
+        self.view.addAction(self.copy_action)
+
+    def selected_ranges(self) -> tuple:
+        """Maps the current selection to sorted row and column positions
+
+        Like a spreadsheet, multiple ranges can only be copied if they
+        span the same rows or the same columns, so that every cell in
+        rows x columns was selected.
+
+        Returns:
+            tuple of np.ndarray: (rows, columns)
+
+        Raises:
+            ValueError: if the ranges do not form a rectangular block
+
+        """
+        ranges = self.view.selectionModel().selection()
+        if ranges.isEmpty():
+            return np.array([], dtype=int), np.array([], dtype=int)
+        row_spans = {(r.top(), r.bottom()) for r in ranges}
+        column_spans = {(r.left(), r.right()) for r in ranges}
+        if len(row_spans) > 1 and len(column_spans) > 1:
+            raise ValueError("This action won't work on multiple selections")
+        rows = np.unique(np.concatenate([np.arange(top, bottom + 1) for top, bottom in row_spans]))
+        columns = np.unique(np.concatenate([np.arange(left, right + 1) for left, right in column_spans]))
+        return rows, columns
+
+    @Slot()
+    def copy_selection(self) -> None:
+        """Copies selected cells to the clipboard in one slice of the dataframe"""
+        try:
+            rows, columns = self.selected_ranges()
+        except ValueError as e:
+            QMessageBox.warning(self.view, 'Copy', str(e))
+            return
+        if not len(rows):
+            return
+        QGuiApplication.clipboard().setText(self.model.to_tsv(rows, columns))
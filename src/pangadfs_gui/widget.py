@@ -3,19 +3,25 @@
 # Copyright (C) 2021 Eric Truett
 # Licensed under the MIT License
 
+import copy
+import time
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, List
 
 import numpy as np
+import pandas as pd
 import polars as pl
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal, Slot
 from PySide6.QtGui import QIcon, QPixmap, QFont
 from PySide6.QtWidgets import (QFormLayout, QLabel, QTableView, QHBoxLayout, QHeaderView, QSizePolicy, QWidget, 
-                               QVBoxLayout, QToolButton, QWidget, QStyle, QFileDialog, QLineEdit)
+                               QVBoxLayout, QToolButton, QWidget, QStyle, QFileDialog, QLineEdit, QMessageBox)
 
 from pyqtconfig import ConfigManager
-from pangadfs_gui.model import DataframeModel
+from pangadfs.ga import GeneticAlgorithm
+from pangadfs_gui.model import DataframeModel, PandasModel
+from pangadfs_gui.optimizer import (DEFAULT_CTX, FLAG_COLUMNS, REQUIRED_COLUMNS, cache_pool, lineups_frame,
+                                    player_flags, reoptimize, top_lineups)
 from pangadfs_gui.view import DataframeView
 
 
@@ -45,8 +51,9 @@ class DataframeWidget(QWidget):
         self.main_layout = QHBoxLayout()
         size = QSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
         size.setHorizontalStretch(0)
-        self.table_view.setSizePolicy(size)
-        self.main_layout.addWidget(self.table_view)
+        # DataframeView configures (and owns) the table that has the model
+        self.table_view.view.setSizePolicy(size)
+        self.main_layout.addWidget(self.table_view.view)
         self.setLayout(self.main_layout)
 
 
@@ -57,11 +64,18 @@ class ButtonStripWidget(QWidget):
         self.main_layout = QHBoxLayout()
         if buttons:
             for button in buttons:
-                self.main_layout.add(self._make_button(button))
+                self.add_button(button)
         if margins:
-            self.main_layout.setContentsMargins(margins)
+            self.main_layout.setContentsMargins(*margins)
         if alignment:
             self.main_layout.setAlignment(alignment)
+        self.setLayout(self.main_layout)
+
+    def add_button(self, data: dict) -> QToolButton:
+        """Adds button given values in data"""
+        b = self._make_button(data)
+        self.main_layout.addWidget(b)
+        return b
 
     def _make_button(self, data):
         """Makes button given values in data"""
@@ -75,20 +89,184 @@ class ButtonStripWidget(QWidget):
                 b.setIcon(QIcon(QPixmap(data['icon'])))
             else:
                 b.setIcon(self.style().standardIcon(getattr(QStyle.StandardPixmap, data['icon'])))
+        return b
 
 
 class TabWidget(QWidget):
     """Base 2-column widget for tabs"""
-    def __init__(self, config: ConfigManager):
+    def __init__(self, config: ConfigManager, model: DataframeModel = None):
         super().__init__()
         self.main_layout = QVBoxLayout()
-        self.button_strip = ButtonStripWidget()
-        self.dataframe_widget = DataframeWidget(model=DataframeModel(df=None))
+        self.button_strip = ButtonStripWidget(alignment=Qt.AlignLeft)
+        self.model = model if model is not None else DataframeModel(df=None)
+        self.dataframe_widget = DataframeWidget(model=self.model)
         self.main_layout.addWidget(self.button_strip)
         self.main_layout.addWidget(self.dataframe_widget)
         self.setLayout(self.main_layout)
 
 
+class OptimizeSignals(QObject):
+    """Signals for OptimizeWorker, QRunnable cannot emit signals itself"""
+
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class OptimizeWorker(QRunnable):
+    """Runs the optimizer (first time) and re-optimization on a thread pool thread"""
+
+    PLAYER_KEYS = ['player', 'team', 'pos']
+
+    def __init__(self,
+                 ga: GeneticAlgorithm,
+                 csvpth: Path,
+                 flags: pd.DataFrame,
+                 population: np.ndarray = None,
+                 pool: pd.DataFrame = None):
+        """Creates worker
+
+        Args:
+            ga (GeneticAlgorithm): the ga instance
+            csvpth (Path): the projections file
+            flags (pd.DataFrame): player keys and flag columns, copied from the table
+            population (np.ndarray): the prior population, optimizes from scratch if None
+            pool (pd.DataFrame): the pool loaded by the prior run, reads csvpth if None
+
+        """
+        super().__init__()
+        self.ga = ga
+        self.csvpth = csvpth
+        self.flags = flags
+        self.population = population
+        self.pool = pool
+        self.signals = OptimizeSignals()
+
+    def run(self) -> None:
+        """Emits results dict with the loaded pool, flagged pool and elapsed seconds added"""
+        start = time.perf_counter()
+        try:
+            base_pool = self.pool
+            if base_pool is None:
+                # population holds indices into this pool, optimize() reuses it
+                base_pool = cache_pool(self.ga, self.csvpth)
+            population = self.population
+            if population is None:
+                population = self.ga.optimize()['population']
+            pool = base_pool.drop(columns=list(FLAG_COLUMNS), errors='ignore')
+            pool = pool.merge(self.flags, on=self.PLAYER_KEYS, how='left')
+            results = reoptimize(self.ga, pool, population)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        results.update(base_pool=base_pool, pool=pool, elapsed=time.perf_counter() - start)
+        self.signals.finished.emit(results)
+
+
+class ProjectionsTabWidget(TabWidget):
+    """Projections tab with lock / exclude / started flags and incremental re-optimization"""
+
+    lineups_changed = Signal(object)
+    summary_changed = Signal(object)
+
+    N_LINEUPS = 150
+
+    def __init__(self, config: ConfigManager, ctx: Dict[str, Any] = None):
+        model = PandasModel(df=pd.DataFrame(columns=REQUIRED_COLUMNS), checkable_columns=FLAG_COLUMNS)
+        super().__init__(config, model=model)
+        self.ctx = copy.deepcopy(ctx or DEFAULT_CTX)
+        self.csvpth = None
+        self.ga = None
+        self.pool = None
+        self.population = None
+        self.lineups = None
+        self.lineup_numbers = None
+        self.worker = None
+        self.load_button = self.button_strip.add_button(
+            {'tooltip': 'Load projections', 'icon': 'SP_DialogOpenButton', 'connect': self.open_projections})
+        self.optimize_button = self.button_strip.add_button(
+            {'tooltip': 'Optimize', 'icon': 'SP_MediaPlay', 'connect': self.optimize})
+
+    @Slot()
+    def open_projections(self) -> None:
+        """Opens file dialog to load projections"""
+        fn, _ = QFileDialog.getOpenFileName(self, 'Load projections', filter='CSV files (*.csv)')
+        if fn:
+            self.load_projections(fn)
+
+    def load_projections(self, fn: str) -> None:
+        """Loads projections and discards lineups from the prior slate"""
+        self.model.loadCsv(fn)
+        self.csvpth = Path(fn)
+        self.ga = None
+        self.pool = None
+        self.population = None
+        self.lineups = None
+        self.lineup_numbers = None
+
+    def set_running(self, running: bool) -> None:
+        """Disables buttons while the optimizer runs"""
+        self.load_button.setEnabled(not running)
+        self.optimize_button.setEnabled(not running)
+
+    @Slot()
+    def optimize(self) -> None:
+        """Optimizes from scratch once, then re-optimizes the existing lineups, in the background
+
+        With late swap, the published lineups are re-optimized instead of the population.
+
+        """
+        if self.csvpth is None:
+            return
+        if self.ga is None:
+            ctx = copy.deepcopy(self.ctx)
+            ctx['ga_settings']['csvpth'] = self.csvpth
+            self.ga = GeneticAlgorithm(ctx=ctx, use_defaults=True)
+        flags = self.model.df[OptimizeWorker.PLAYER_KEYS + list(FLAG_COLUMNS)]
+        flags = flags.drop_duplicates(OptimizeWorker.PLAYER_KEYS).copy()
+        population = self.population
+        if self.lineups is not None and player_flags(flags)[2].any():
+            population = self.lineups
+        # keep a reference so the signals outlive the runnable
+        self.worker = OptimizeWorker(self.ga, self.csvpth, flags, population, self.pool)
+        self.worker.signals.finished.connect(self.optimized)
+        self.worker.signals.failed.connect(self.optimize_failed)
+        self.set_running(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    @Slot(object)
+    def optimized(self, results: dict) -> None:
+        """Keeps population for the next run and publishes lineups and summary
+
+        Late swap keeps the published lineups and their numbers, otherwise lineups are re-ranked.
+
+        """
+        self.set_running(False)
+        self.pool = results['base_pool']
+        if results['lineup_ids'] is not None and self.lineups is not None:
+            lineups, scores = results['population'], results['fitness']
+            self.lineup_numbers = self.lineup_numbers[results['lineup_ids']]
+        else:
+            self.population = results['population']
+            lineups, scores = top_lineups(results['population'], results['fitness'], self.N_LINEUPS)
+            self.lineup_numbers = np.arange(len(lineups))
+        self.lineups = lineups
+        self.lineups_changed.emit(lineups_frame(results['pool'], lineups, scores, self.lineup_numbers))
+        self.summary_changed.emit(pd.DataFrame([{
+            'n_population': len(results['population']),
+            'n_lineups': len(lineups),
+            'n_repaired': results['n_repaired'],
+            'best_score': float(results['best_score']),
+            'mean_score': float(scores.mean()),
+            'elapsed': round(results['elapsed'], 2)
+        }]))
+
+    @Slot(str)
+    def optimize_failed(self, message: str) -> None:
+        """Shows optimizer error"""
+        self.set_running(False)
+        QMessageBox.warning(self, 'Optimize', message)
+
+
 class SidebarConfigWidget(QWidget):
     def __init__(self, config: ConfigManager, label: str = 'Settings', margins: tuple = (0, 12, 0, 5), alignment: Qt.Alignment = Qt.AlignTop):
         super().__init__()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import sys
 
@@ -29,3 +30,33 @@ def tprint(request, capsys):
             sys.stdout.write('\n{}'.format(line))
 
 
+
+
+@pytest.fixture()
+def projections():
+    """Synthetic player pool with enough players per position to optimize"""
+    pd = pytest.importorskip('pandas')
+    np = pytest.importorskip('numpy')
+    rng = np.random.default_rng(0)
+    rows = []
+    for pos, n, base in (('QB', 12, 18), ('RB', 24, 12), ('WR', 36, 12), ('TE', 12, 9), ('DST', 10, 7)):
+        for i in range(n):
+            rows.append({'player': f'{pos}{i}', 'team': f'T{i % 10}', 'pos': pos,
+                         'salary': int(rng.integers(30, 90)) * 100, 'proj': round(base + rng.random() * 10, 2)})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture()
+def slate_dir(tmp_path, projections):
+    """Directory with two projection files"""
+    for slate in ('early', 'main'):
+        projections.to_csv(tmp_path / f'{slate}.csv', index=False)
+    return tmp_path
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """QApplication for model / view tests, runs offscreen"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    QtWidgets = pytest.importorskip('PySide6.QtWidgets')
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,49 @@
+# tests/test_batch.py
+
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pangadfs')
+pytest.importorskip('pyarrow')
+
+from pangadfs_gui.batch import main, make_ctx, parse_args
+
+
+def test_make_ctx(tmp_path):
+    """Test make_ctx layers config file and arguments over defaults"""
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'site_settings': {'salary_cap': 60000}, 'ga_settings': {'n_generations': 7}}))
+    ctx = make_ctx(parse_args([str(tmp_path), '-c', str(config), '--n-generations', '3']))
+    assert ctx['site_settings']['salary_cap'] == 60000
+    assert ctx['site_settings']['lineup_size'] == 9
+    assert ctx['ga_settings']['n_generations'] == 3
+    assert ctx['ga_settings']['population_size'] == 30000
+
+
+@pytest.mark.parametrize('value', ['0', '-2'])
+def test_parse_args_rejects_workers(tmp_path, value):
+    """Test --workers must be positive"""
+    with pytest.raises(SystemExit):
+        parse_args([str(tmp_path), '--workers', value])
+
+
+def test_main(slate_dir, projections):
+    """Test main writes lineups and summary for each slate"""
+    assert main([str(slate_dir), '-w', '2', '-n', '5', '--population-size', '500', '--n-generations', '2']) == 0
+    outdir = slate_dir / 'output'
+    summary = pd.read_parquet(outdir / 'summary.parquet')
+    assert summary.slate.tolist() == ['early', 'main']
+    assert summary.n_pool.tolist() == [len(projections)] * 2
+    lineups = pd.read_parquet(outdir / 'main_lineups.parquet')
+    assert lineups.lineup.nunique() == 5
+    assert (lineups.groupby('lineup').size() == 9).all()
+
+
+def test_main_missing_columns(tmp_path, projections):
+    """Test main reports slates with missing columns as failed"""
+    projections.drop(columns='proj').to_csv(tmp_path / 'bad.csv', index=False)
+    assert main([str(tmp_path), '-w', '1']) == 1
+    assert not (tmp_path / 'output' / 'summary.parquet').exists()
@@ -0,0 +1,29 @@
+# tests/test_loader.py
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from pangadfs_gui.loader import read_csv
+
+
+def test_read_csv_positional_args(monkeypatch):
+    """Test positional arguments go to the reader, not the backend"""
+    calls = []
+    monkeypatch.setattr(pd, 'read_csv', lambda *args, **kwargs: calls.append((args, kwargs)))
+    read_csv('pool.csv', ';', nrows=1)
+    assert calls == [(('pool.csv', ';'), {'nrows': 1})]
+
+
+def test_read_csv_polars(tmp_path):
+    """Test polars backend is chosen by keyword"""
+    pytest.importorskip('polars')
+    fn = tmp_path / 'pool.csv'
+    fn.write_text('player,proj\na,1.5\n')
+    assert read_csv(fn, backend='polars').height == 1
+
+
+def test_read_csv_missing_backend(tmp_path):
+    """Test unknown backend raises"""
+    with pytest.raises(ValueError):
+        read_csv(tmp_path / 'pool.csv', backend='arrow')
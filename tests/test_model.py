@@ -0,0 +1,117 @@
+# tests/test_model.py
+
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+QtCore = pytest.importorskip('PySide6.QtCore')
+
+from pangadfs_gui.model import PandasModel
+
+Qt = QtCore.Qt
+
+
+@pytest.fixture()
+def model(qapp):
+    """Small unsorted model"""
+    df = pd.DataFrame({'player': ['c', 'a', 'b'], 'proj': [3.5, 1.0, 2.25], 'pos': ['QB', 'RB', 'WR']})
+    return PandasModel(df)
+
+
+def test_to_tsv(model):
+    """Test to_tsv slices rows and columns by position"""
+    assert model.to_tsv([0, 2], [0, 1]) == 'c\t3.5\nb\t2.25\n'
+    assert model.to_tsv([1], [0, 2], header=True) == 'player\tpos\na\tRB\n'
+
+
+def test_to_tsv_sorted(model):
+    """Test to_tsv follows the sorted row order shown in the view"""
+    model.sort(1, Qt.AscendingOrder)
+    assert model.to_tsv([0, 1], [0]) == 'a\nb\n'
+    model.sort(1, Qt.DescendingOrder)
+    assert model.to_tsv([0], [0, 1]) == 'c\t3.5\n'
+
+
+def test_to_tsv_timing(qapp, tprint):
+    """Test copying 100k rows is well under a second"""
+    n = 100_000
+    df = pd.DataFrame({'player': [f'p{i}' for i in range(n)], 'proj': np.random.random(n), 'salary': np.arange(n)})
+    model = PandasModel(df.sample(frac=1, random_state=0))
+    start = time.perf_counter()
+    tsv = model.to_tsv(np.arange(n), np.arange(3))
+    elapsed = time.perf_counter() - start
+    tprint(f'to_tsv: {n:,} rows in {elapsed:.3f}s')
+    assert tsv.count('\n') == n
+    assert elapsed < 1
+
+
+def wait_for_stats(qapp):
+    """Waits for the statistics workers and delivers their results"""
+    QtCore.QThreadPool.globalInstance().waitForDone()
+    qapp.processEvents()
+
+
+def test_column_stats_tooltip(qapp, monkeypatch):
+    """Test every column gets stats even when one column fails or has inf"""
+    import pangadfs_gui.model
+
+    def column_stats(s):
+        if s.name == 'bad':
+            raise TypeError('boom')
+        return stats_column_stats(s)
+
+    stats_column_stats = pangadfs_gui.model.column_stats
+    monkeypatch.setattr(pangadfs_gui.model, 'column_stats', column_stats)
+    df = pd.DataFrame({'bad': [1, 2, 3], 'inf': [1.0, np.inf, 2.0], 'pos': ['QB', 'RB', 'QB']})
+    model = PandasModel(df)
+    wait_for_stats(qapp)
+    assert set(model.column_stats) == {'bad', 'inf', 'pos'}
+    assert model.column_stats['bad'] == {'error': 'boom'}
+    assert 'inf: 1' in model.headerData(1, Qt.Horizontal, Qt.ToolTipRole)
+    assert 'QB: 2' in model.headerData(2, Qt.Horizontal, Qt.ToolTipRole)
+
+
+def test_column_stats_invalidated_on_edit(qapp):
+    """Test editing a flag recalculates only that column"""
+    df = pd.DataFrame({'proj': [1.0, 2.0], 'lock': [False, False]})
+    model = PandasModel(df, checkable_columns=['lock'])
+    wait_for_stats(qapp)
+    proj_stats = model.column_stats['proj']
+    model.setData(model.index(0, 1), Qt.Checked.value, Qt.CheckStateRole)
+    assert 'lock' not in model.column_stats
+    wait_for_stats(qapp)
+    assert model.column_stats['lock']['top'].to_dict() == {False: 1, True: 1}
+    assert model.column_stats['proj'] is proj_stats
+
+
+def test_stats_columns_copies_only_checkable(qapp):
+    """Test the worker gets copies of flag columns and the other columns as they are"""
+    df = pd.DataFrame({'proj': np.arange(1000.0), 'lock': False})
+    model = PandasModel(df, checkable_columns=['lock'])
+    wait_for_stats(qapp)
+    columns = model.stats_columns(['proj', 'lock'])
+    assert np.shares_memory(columns['proj'].to_numpy(), model.df['proj'].to_numpy())
+    assert not np.shares_memory(columns['lock'].to_numpy(), model.df['lock'].to_numpy())
+    model.setData(model.index(0, 1), Qt.Checked.value, Qt.CheckStateRole)
+    assert not columns['lock'].any()
+
+
+def test_polars_column_stats_tooltip(qapp):
+    """Test polars model shows the same header statistics"""
+    pl = pytest.importorskip('polars')
+    from pangadfs_gui.model import PolarsModel
+    model = PolarsModel(pl.DataFrame({'proj': [1.0, 2.0, 3.0], 'pos': ['QB', 'RB', 'QB']}))
+    wait_for_stats(qapp)
+    assert 'mean: 2.00' in model.headerData(0, Qt.Horizontal, Qt.ToolTipRole)
+    assert 'QB: 2' in model.headerData(1, Qt.Horizontal, Qt.ToolTipRole)
+
+
+def test_polars_to_tsv(qapp):
+    """Test polars model serializes rows and columns by position"""
+    pl = pytest.importorskip('polars')
+    from pangadfs_gui.model import PolarsModel
+    model = PolarsModel(pl.DataFrame({'player': ['c', 'a', 'b'], 'proj': [3.5, 1.0, 2.25]}))
+    assert model.to_tsv(np.array([2, 0]), np.array([0, 1])) == 'b\t2.25\nc\t3.5\n'
+    assert model.to_tsv([1], [1], header=True) == 'proj\n1.0\n'
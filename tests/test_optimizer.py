@@ -0,0 +1,212 @@
+# tests/test_optimizer.py
+
+import copy
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pangadfs')
+
+from pangadfs.ga import GeneticAlgorithm
+from pangadfs_gui.optimizer import (DEFAULT_CTX, cache_pool, find_violations, lineups_frame, local_search,
+                                    reoptimize, repair, swap_candidates, top_lineups, valid_lineups)
+
+
+def flags(n, **kwargs):
+    """Creates (locked, excluded, started) with given indices set"""
+    arrays = {}
+    for name in ('locked', 'excluded', 'started'):
+        arrays[name] = np.zeros(n, dtype=bool)
+        arrays[name][kwargs.get(name, [])] = True
+    return arrays['locked'], arrays['excluded'], arrays['started']
+
+
+# players 0-1 are position 0, players 2-5 are position 1
+POSITIONS = np.array([0, 0, 1, 1, 1, 1])
+
+
+def test_find_violations():
+    """Test lineups with excluded players or missing locks are flagged"""
+    population = np.array([[0, 2], [0, 3], [1, 2]])
+    locked, excluded, _ = flags(6, locked=[0], excluded=[3])
+    assert find_violations(population, locked, excluded).tolist() == [False, True, True]
+
+
+def test_repair_leaves_valid_lineups():
+    """Test repair returns population untouched when nothing is violated"""
+    population = np.array([[0, 2], [1, 3]])
+    assert repair(population, POSITIONS, *flags(6)) is population
+
+
+def test_repair_excluded():
+    """Test excluded players are replaced by a same-position player"""
+    population = np.array([[0, 2], [1, 3]])
+    locked, excluded, started = flags(6, excluded=[3])
+    repaired = repair(population, POSITIONS, locked, excluded, started, np.random.default_rng(0))
+    assert len(repaired) == 2
+    assert not excluded[repaired].any()
+    assert (POSITIONS[repaired] == POSITIONS[population]).all()
+
+
+def test_repair_lock():
+    """Test missing locks replace a same-position player"""
+    population = np.array([[0, 2], [1, 3]])
+    locked, excluded, started = flags(6, locked=[4])
+    repaired = repair(population, POSITIONS, locked, excluded, started)
+    assert sorted(repaired.tolist()) == [[0, 4], [1, 4]]
+
+
+def test_repair_started_lock_not_added():
+    """Test a locked player whose game started is never swapped in"""
+    population = np.array([[0, 2], [0, 3]])
+    locked, excluded, started = flags(6, locked=[4], started=[4])
+    assert not find_violations(population, locked & ~started, excluded).any()
+    assert repair(population, POSITIONS, locked, excluded, started).tolist() == population.tolist()
+
+
+def test_repair_started_player_kept():
+    """Test a lock does not swap out a player whose game started"""
+    population = np.array([[0, 2]])
+    locked, excluded, started = flags(6, locked=[3], started=[2])
+    assert len(repair(population, POSITIONS, locked, excluded, started)) == 0
+
+
+def test_repair_no_candidates():
+    """Test lineups that cannot be repaired are dropped"""
+    population = np.array([[0, 2], [1, 2]])
+    locked, excluded, started = flags(6, excluded=[0, 1])
+    assert repair(population, POSITIONS, locked, excluded, started).shape == (0, 2)
+
+
+def test_repair_keeps_order():
+    """Test repaired lineups stay in place and the index maps them to the input rows"""
+    population = np.array([[0, 3], [1, 2], [0, 5], [1, 3]])
+    locked, excluded, started = flags(6, excluded=[3, 4, 5], started=[2])
+    repaired, index = repair(population, POSITIONS, locked, excluded, started, return_index=True)
+    assert index.tolist() == [1]
+    assert repaired.tolist() == [[1, 2]]
+    locked, excluded, started = flags(6, excluded=[3])
+    repaired, index = repair(population, POSITIONS, locked, excluded, started, return_index=True)
+    assert index.tolist() == [0, 1, 2, 3]
+    assert repaired[[1, 2]].tolist() == [[1, 2], [0, 5]]
+
+
+def test_valid_lineups():
+    """Test salary cap and duplicate players are flagged without reordering"""
+    population = np.array([[0, 2], [1, 1], [4, 5]])
+    salaries = np.array([1, 1, 1, 1, 5, 6])
+    assert valid_lineups(population, salaries, 10).tolist() == [True, False, False]
+
+
+def test_local_search():
+    """Test local search improves lineups without moving frozen players"""
+    population = np.array([[0, 2], [1, 3]])
+    points = np.array([1.0, 2.0, 1.0, 1.0, 5.0, 2.0])
+    salaries = np.ones(6)
+    frozen = np.zeros(6, dtype=bool)
+    frozen[[0, 1]] = True
+    candidates = swap_candidates(POSITIONS, ~frozen)
+    improved = local_search(population, POSITIONS, points, salaries, 10, frozen, candidates,
+                            rng=np.random.default_rng(0))
+    assert improved[:, 0].tolist() == [0, 1]
+    assert improved[:, 1].tolist() == [4, 4]
+
+
+def test_top_lineups():
+    """Test top_lineups drops duplicate lineups and sorts by fitness"""
+    population = np.array([[0, 1], [1, 0], [2, 3], [4, 5]])
+    fitness = np.array([5.0, 5.0, 9.0, 1.0])
+    lineups, scores = top_lineups(population, fitness, 2)
+    assert lineups.tolist() == [[2, 3], [0, 1]]
+    assert scores.tolist() == [9.0, 5.0]
+
+
+@pytest.fixture()
+def optimized(tmp_path, projections):
+    """GeneticAlgorithm, pool and results for a small optimization"""
+    np.random.seed(0)
+    csvpth = tmp_path / 'pool.csv'
+    projections.to_csv(csvpth, index=False)
+    ctx = copy.deepcopy(DEFAULT_CTX)
+    ctx['ga_settings'].update(csvpth=csvpth, population_size=500, n_generations=3)
+    ga = GeneticAlgorithm(ctx=ctx, use_defaults=True)
+    return ga, ga.pool(csvpth=csvpth), ga.optimize()
+
+
+def test_reoptimize_lock_exclude(optimized):
+    """Test reoptimize enforces locks and excludes without shrinking the population"""
+    ga, pool, results = optimized
+    population = results['population']
+    lock = pool.index[pool.pos == 'TE'][0]
+    exclude = pool.index[pool.pos == 'QB'][:3]
+    pool = pool.assign(lock=False, exclude=False)
+    pool.loc[lock, 'lock'] = True
+    pool.loc[exclude, 'exclude'] = True
+    res = reoptimize(ga, pool, population, n_generations=2)
+    assert res['n_repaired'] > 0
+    assert len(res['population']) >= len(population)
+    assert (res['population'] == lock).any(axis=1).all()
+    assert not np.isin(res['population'], exclude).any()
+    assert len(lineups_frame(pool, res['population'][:2], res['fitness'][:2])) == 18
+
+
+def test_reoptimize_late_swap(optimized):
+    """Test late swap keeps the prior lineups, their order and every started or locked slot"""
+    ga, pool, results = optimized
+    population, _ = top_lineups(results['population'], results['fitness'], 150)
+    used = np.unique(population)
+    started = np.setdiff1d(pool.index[pool.pos == 'RB'], used)[:3]
+    started = np.union1d(started, pool.index[pool.pos == 'QB'])
+    locked = population[0, pool.loc[population[0], 'pos'].values == 'WR'][:1]
+    pool = pool.assign(started=pool.index.isin(started), lock=pool.index.isin(np.union1d(started, locked)))
+    res = reoptimize(ga, pool, population, n_generations=2)
+    new_ids = res['lineup_ids']
+    assert len(res['population']) == len(new_ids) <= len(population)
+    assert (np.diff(new_ids) > 0).all()
+    prior = population[new_ids]
+    frozen = pool.index.isin(np.union1d(started, locked))[prior]
+    assert (res['population'][frozen] == prior[frozen]).all()
+    assert not np.isin(res['population'][~frozen], started).any()
+    assert (res['population'] == locked[0]).any(axis=1).all()
+
+
+def test_reoptimize_timing(tmp_path, projections, tprint):
+    """Test re-optimizing after a change is faster than optimizing from scratch"""
+    csvpth = tmp_path / 'pool.csv'
+    projections.to_csv(csvpth, index=False)
+    ctx = copy.deepcopy(DEFAULT_CTX)
+    ctx['ga_settings'].update(csvpth=csvpth, population_size=5000)
+    ga = GeneticAlgorithm(ctx=ctx, use_defaults=True)
+    pool = cache_pool(ga, csvpth)
+    start = time.perf_counter()
+    population = ga.optimize()['population']
+    optimize_elapsed = time.perf_counter() - start
+    pool = pool.assign(exclude=pool.index == population[0, 0])
+    start = time.perf_counter()
+    reoptimize(ga, pool, population)
+    reoptimize_elapsed = time.perf_counter() - start
+    tprint(f'optimize: {optimize_elapsed:.3f}s, reoptimize: {reoptimize_elapsed:.3f}s')
+    assert reoptimize_elapsed < optimize_elapsed
+
+
+def test_reoptimize_infeasible(optimized):
+    """Test reoptimize raises when every player at a position is excluded"""
+    ga, pool, results = optimized
+    pool = pool.assign(exclude=pool.pos == 'RB')
+    with pytest.raises(ValueError):
+        reoptimize(ga, pool, results['population'])
+
+
+def test_cache_pool(tmp_path, projections):
+    """Test the ga reuses the cached pool instead of reading the csv again"""
+    csvpth = tmp_path / 'pool.csv'
+    projections.to_csv(csvpth, index=False)
+    ctx = copy.deepcopy(DEFAULT_CTX)
+    ctx['ga_settings'].update(csvpth=csvpth, population_size=200, n_generations=1)
+    ga = GeneticAlgorithm(ctx=ctx, use_defaults=True)
+    pool = cache_pool(ga, csvpth)
+    csvpth.unlink()
+    assert ga.pool(csvpth=csvpth) is pool
+    assert ga.optimize()['population'].max() < len(pool)
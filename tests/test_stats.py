@@ -0,0 +1,59 @@
+# tests/test_stats.py
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from pangadfs_gui.stats import column_stats, format_stats, sparkline
+
+
+def test_column_stats_numeric():
+    """Test numeric column gets min / max / mean / histogram"""
+    stats = column_stats(pd.Series([1.0, 2.0, 3.0, np.nan]), bins=2)
+    assert (stats['count'], stats['nulls'], stats['inf']) == (3, 1, 0)
+    assert (stats['min'], stats['max'], stats['mean']) == (1.0, 3.0, 2.0)
+    assert stats['hist'].tolist() == [1, 2]
+
+
+def test_column_stats_inf():
+    """Test infinite values are counted and left out of the histogram"""
+    stats = column_stats(pd.Series([1.0, np.inf, -np.inf, 3.0]))
+    assert stats['inf'] == 2
+    assert (stats['min'], stats['max']) == (1.0, 3.0)
+    assert stats['hist'].sum() == 2
+    assert 'inf: 2' in format_stats('x', stats)
+
+
+def test_column_stats_all_nan():
+    """Test all-NaN column has counts but no histogram"""
+    stats = column_stats(pd.Series([np.nan, np.nan]))
+    assert (stats['count'], stats['nulls']) == (0, 2)
+    assert 'hist' not in stats
+    assert format_stats('x', stats) == 'x\ncount: 0  nulls: 2'
+
+
+def test_column_stats_bool():
+    """Test bool column gets value counts"""
+    stats = column_stats(pd.Series([True, False, True]))
+    assert stats['top'].to_dict() == {True: 2, False: 1}
+    assert 'True: 2' in format_stats('x', stats)
+
+
+def test_column_stats_object():
+    """Test object column gets top values"""
+    stats = column_stats(pd.Series(['a', 'b', 'a', None]), bins=1)
+    assert stats['nulls'] == 1
+    assert stats['top'].to_dict() == {'a': 2}
+
+
+def test_sparkline():
+    """Test sparkline scales counts to block characters"""
+    assert sparkline(np.array([0, 1, 2])) == '▁▅█'
+    assert sparkline(np.array([0, 0])) == ''
+    assert sparkline(np.array([])) == ''
+
+
+def test_format_stats_error():
+    """Test error result is shown in the tooltip"""
+    assert format_stats('x', {'error': 'boom'}) == 'x\nstatistics failed: boom'
@@ -0,0 +1,76 @@
+# tests/test_view.py
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+QtCore = pytest.importorskip('PySide6.QtCore')
+
+from pangadfs_gui.model import PandasModel
+from pangadfs_gui.view import DataframeView
+
+QItemSelection = QtCore.QItemSelection
+QItemSelectionModel = QtCore.QItemSelectionModel
+
+
+@pytest.fixture()
+def view(qapp):
+    """View over a 10 x 5 frame"""
+    df = pd.DataFrame(np.arange(50).reshape(10, 5), columns=list('ABCDE'))
+    return DataframeView(PandasModel(df))
+
+
+def select(view, *ranges):
+    """Selects (top, left, bottom, right) ranges"""
+    model = view.view.model()
+    selection = QItemSelection()
+    for top, left, bottom, right in ranges:
+        selection.select(model.index(top, left), model.index(bottom, right))
+    view.view.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+
+def test_selected_ranges_empty(view):
+    """Test empty selection gives no rows or columns"""
+    rows, columns = view.selected_ranges()
+    assert not len(rows) and not len(columns)
+
+
+def test_selected_ranges_block(view):
+    """Test a single block maps to its rows and columns"""
+    select(view, (1, 1, 3, 2))
+    rows, columns = view.selected_ranges()
+    assert rows.tolist() == [1, 2, 3]
+    assert columns.tolist() == [1, 2]
+
+
+def test_selected_ranges_same_rows(view):
+    """Test ranges spanning the same rows combine their columns"""
+    select(view, (0, 0, 1, 0), (0, 3, 1, 3))
+    rows, columns = view.selected_ranges()
+    assert rows.tolist() == [0, 1]
+    assert columns.tolist() == [0, 3]
+
+
+def test_selected_ranges_rejects_scattered(view):
+    """Test A1:A2 + D5:D6 is rejected rather than copying A1:D6"""
+    select(view, (0, 0, 1, 0), (4, 3, 5, 3))
+    with pytest.raises(ValueError):
+        view.selected_ranges()
+
+
+def test_dataframe_widget_shows_view_with_copy(qapp):
+    """Test DataframeWidget lays out the table that has the model and the Copy action"""
+    pytest.importorskip('pyqtconfig')
+    from pangadfs_gui.widget import DataframeWidget
+    model = PandasModel(pd.DataFrame({'A': [1, 2]}))
+    widget = DataframeWidget(model)
+    shown = widget.main_layout.itemAt(0).widget()
+    assert shown is widget.table_view.view
+    assert shown.model() is model
+    assert widget.table_view.copy_action in shown.actions()
+
+
+def test_view_empty_model(qapp):
+    """Test the placeholder tabs built with an empty frame do not fail on the sort indicator"""
+    view = DataframeView(PandasModel(pd.DataFrame()))
+    assert view.view.model().rowCount() == 0
@@ -0,0 +1,28 @@
+# tests/test_widget.py
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('PySide6.QtCore')
+pytest.importorskip('pyqtconfig')
+pytest.importorskip('pangadfs')
+
+from pyqtconfig import ConfigManager
+from pangadfs_gui.widget import ProjectionsTabWidget
+
+
+def test_late_swap_keeps_lineup_numbers(qapp):
+    """Test late swap results are published in prior order with prior lineup numbers"""
+    tab = ProjectionsTabWidget(ConfigManager())
+    pool = pd.DataFrame({'player': list('abcdef'), 'proj': np.arange(6.0)})
+    tab.lineups = np.array([[0, 1], [2, 3], [4, 5]])
+    tab.lineup_numbers = np.array([0, 1, 2])
+    published = []
+    tab.lineups_changed.connect(published.append)
+    tab.optimized({'population': np.array([[0, 1], [4, 5]]), 'fitness': np.array([1.0, 9.0]),
+                   'lineup_ids': np.array([0, 2]), 'n_repaired': 1, 'best_score': 9.0, 'elapsed': 0.1,
+                   'pool': pool, 'base_pool': pool})
+    assert published[0].lineup.tolist() == [0, 0, 2, 2]
+    assert published[0].player.tolist() == list('abef')
+    assert tab.lineup_numbers.tolist() == [0, 2]